@@ -0,0 +1,30 @@
+# Driver to produce the three all-stats heat plots in a single Python process,
+# so that the seaborn / matplotlib / h5py imports and library initialization
+# are only paid once across the figures.  With DA_BATCH=1 the figures render
+# offscreen on the Agg backend and the PNG encoding of each figure overlaps
+# with building the next one.
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import plt_smoother_rmse_spread_all_stats_4_pane as versus_ens
+import plt_smoother_rmse_spread_all_stats_4_pane_verus_shift as versus_shift
+import plt_smoother_rmse_spread_all_stats_4_pane_verus_tanl as versus_tanl
+
+
+def main():
+    if os.environ.get("DA_BATCH"):
+        # a single worker overlaps each figure's PNG encoding with loading the
+        # data for the next one while keeping the draws serialized, matplotlib
+        # rendering is not thread-safe even on Agg
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            versus_ens.main(executor)
+            versus_shift.main(executor)
+            versus_tanl.main(executor)
+    else:
+        versus_ens.main()
+        versus_shift.main()
+        versus_tanl.main()
+
+
+if __name__ == "__main__":
+    main()
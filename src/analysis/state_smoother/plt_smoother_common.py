@@ -0,0 +1,107 @@
+# Shared helpers for the all-stats smoother heat plot scripts, factored out so
+# that the panel layout and the optimal-value selection are defined in one place
+# and the plotting scripts can be driven from a single Python process.
+import numpy as np
+
+# horizontal / vertical anchors of the 8 x 3 panel grid shared by the scripts,
+# the first four columns hold the rmse panels and the last four the spread panels
+PANEL_H_POSITIONS = [.071, .176, .281, .386, .524, .629, .734, .839]
+PANEL_V_POSITIONS = [.085, .375, .665]
+
+# map from the method keys in the processed data to the scheme names used in
+# the figure labels, replacing the repeated if / elif ladders in the scripts
+SCHEME_NAMES = {
+    "etks_classic": "ETKS",
+    "etks_single_iteration": "SIEnKS",
+    "enks-n-dual_classic": "EnKS-N",
+    "enks-n-primal_classic": "EnKS-N",
+    "enks-n-primal-ls_classic": "EnKS-N",
+    "mles-n-transform_classic": "EnKS-N",
+    "enks-n-dual_single_iteration": "SIEnKS-N",
+    "enks-n-primal_single_iteration": "SIEnKS-N",
+    "enks-n-primal-ls_single_iteration": "SIEnKS-N",
+    "mles-n-transform_single_iteration": "SIEnKS-N",
+    "ienks-transform": "IEnKS",
+    "lin-ienks-transform": "Lin-IEnKS",
+    "ienks-n-transform": "IEnKS-N",
+    "lin-ienks-n-transform": "Lin-IEnKS-N",
+    }
+
+
+def build_panel_grid():
+    # creates the figure, the colorbar axis and the 24 panel axes, the panel
+    # axes are returned column-major from the bottom-left corner, split into
+    # the rmse panels and the spread panels -- pyplot is imported here so that
+    # consumers can load this module without paying the matplotlib cold start
+    # before their inputs are validated
+    import matplotlib.pyplot as plt
+    fig = plt.figure()
+    ax0 = fig.add_axes([.935, .085, .02, .830])
+    axes = [fig.add_axes([h, v, .090, .25])
+            for h in PANEL_H_POSITIONS for v in PANEL_V_POSITIONS]
+    return fig, ax0, axes[:12], axes[12:]
+
+
+def style_panel_axes(ax0, rmse_ax_list, spread_ax_list, x_tics, x_labs, y_tics, y_labs,
+                     x_lim=None, x_lab_kwargs=None):
+    # applies the shared tick and label settings to the panel axes in one
+    # batch, only the left column carries y tick labels and only the bottom
+    # row carries x tick labels
+    left_col = rmse_ax_list[:3]
+    bottom_row = (rmse_ax_list + spread_ax_list)[::3]
+    ax0.tick_params(labelsize=20)
+    for ax in rmse_ax_list + spread_ax_list:
+        if x_lim is not None:
+            ax.set_xlim(x_lim)
+        ax.set_xticks(x_tics)
+        ax.set_yticks(y_tics)
+        ax.tick_params(labelsize=20, labelleft=(ax in left_col),
+                       labelbottom=(ax in bottom_row))
+    for ax in bottom_row:
+        ax.set_xticklabels(x_labs, rotation=0, **(x_lab_kwargs or {}))
+    for ax in left_col:
+        ax.set_yticklabels(y_labs, va="bottom", rotation=0)
+
+
+def load_contig(f, name):
+    # zero-copy memory map for contiguous, uncompressed datasets -- the h5py
+    # read path always makes at least one copy, while a contiguous dataset can
+    # be mapped straight from its byte offset in the file; chunked or
+    # compressed datasets have no flat offset and fall back to one bulk read
+    ds = f[name]
+    offset = ds.id.get_offset()
+    if offset is None:
+        return ds[...]
+    return np.memmap(f.filename, dtype=ds.dtype, mode='r', offset=offset,
+                     shape=ds.shape)
+
+
+def tuning_argmin(tuned_rmse):
+    # index of the minimum tuning statistic along the inflation axis -- a
+    # fully diverged configuration leaves an all-nan column, which falls back
+    # to the first inflation value as in the original equality-mask selection
+    # instead of letting nanargmin raise on the all-nan slice
+    all_nan = np.all(np.isnan(tuned_rmse), axis=1)
+    if all_nan.any():
+        tuned_rmse = np.where(all_nan[:, None, :], np.inf, tuned_rmse)
+    return np.nanargmin(tuned_rmse, axis=1)
+
+
+def find_optimal_values(indx, stat_rmse, stat_spread):
+    # gathers the rmse and spread values at the tuning optimum indx, computed
+    # as np.nanargmin of the tuning statistic along axis 1 -- nanargmin breaks
+    # ties by the first index, matching the original equality-mask selection,
+    # and skips nan entries in one pass without rewriting them to inf, so the
+    # preloaded arrays shared across the three statistics are never mutated --
+    # gathering over transposed views lands the outputs in the plotted
+    # orientation without a separate transpose pass, though take_along_axis
+    # returns them Fortran-ordered here
+    indx_t = indx.T[:, None, :]
+    rmse_vals = np.take_along_axis(stat_rmse.transpose(2, 1, 0), indx_t, axis=1)[:, 0, :]
+    spread_vals = np.take_along_axis(stat_spread.transpose(2, 1, 0), indx_t, axis=1)[:, 0, :]
+
+    # float32 is ample precision for colormapped statistics and halves the
+    # bytes the renderer has to touch, and ascontiguousarray fixes the memory
+    # layout to C order in the same copy as the downcast
+    return [np.ascontiguousarray(rmse_vals, dtype=np.float32),
+            np.ascontiguousarray(spread_vals, dtype=np.float32)]